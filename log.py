@@ -1,9 +1,100 @@
+import atexit
 import logging
+import logging.handlers
+import orjson
+import queue
+import threading
+import time
 
 from pathlib import Path
 from dataclasses import dataclass
 
 
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that caches the strftime part of asctime per second;
+    milliseconds still come from the record via %(msecs)03d in fmt
+    """
+
+    def __init__(self, fmt: str, datefmt: str):
+        super().__init__(fmt=fmt, datefmt=datefmt)
+        # single (second, asctime) tuple so the swap is atomic: the formatter
+        # is shared by every queue listener thread
+        self._cached_time: tuple[int, str] = (-1, '')
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        second = int(record.created)
+        cached_second, cached_asctime = self._cached_time
+        if second != cached_second:
+            cached_asctime = time.strftime(datefmt or self.datefmt, time.localtime(second))
+            self._cached_time = (second, cached_asctime)
+        return cached_asctime
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler over a large stream buffer: records are coalesced in memory
+    instead of one write + flush syscall per record; a background thread
+    flushes the buffer every FLUSH_INTERVAL_S to bound data loss (plus
+    a flush at interpreter exit)
+    """
+
+    BUFFER_SIZE = 65536
+    FLUSH_INTERVAL_S = 0.1
+
+    def __init__(self, filename, mode: str = 'w', encoding: str | None = None):
+        super().__init__(filename, mode=mode, encoding=encoding)
+        atexit.register(self.flush)
+        self._stop_flusher = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.BUFFER_SIZE, encoding=self.encoding)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        self._stop_flusher.set()
+        super().close()
+
+    def _flush_loop(self) -> None:
+        # flush() takes the handler lock, so it is safe against concurrent emit()
+        while not self._stop_flusher.wait(self.FLUSH_INTERVAL_S):
+            self.flush()
+
+
+class JsonFileHandler(BufferedFileHandler):
+    """
+    Append-only file handler writing one orjson document per record,
+    skipping the %-style formatter entirely
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename, mode='ab')
+
+    def _open(self):
+        # binary stream: orjson produces bytes
+        return open(self.baseFilename, self.mode, buffering=self.BUFFER_SIZE)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(orjson.dumps({
+                't': record.created,
+                'lvl': record.levelname,
+                'name': record.name,
+                'mod': record.module,
+                'fn': record.funcName,
+                'msg': record.getMessage(),
+            }) + b'\n')
+        except Exception:
+            self.handleError(record)
+
+
 @dataclass
 class LoggerInfo:
     name: str
@@ -15,8 +106,11 @@ class LoggerInfo:
     file_log_level: int | None = None
     file_handler: logging.Handler | None = None
 
+    # background listener that owns the real handlers
+    queue_listener: logging.handlers.QueueListener | None = None
+
     def check_correctness(self) -> None:
-        assert all(map(lambda x: x is not None, [self.logger, self.stdout_log_level, self.stdout_handler, self.file_log_level, self.file_handler])), 'Sanity check'
+        assert None not in (self.logger, self.stdout_log_level, self.stdout_handler, self.file_log_level, self.file_handler, self.queue_listener), 'Sanity check'
 
 
 class Logging:
@@ -35,13 +129,14 @@ class Logging:
     _log_directory: Path | None = None
 
     # common formatter
-    _common_formatter = logging.Formatter(
+    _common_formatter = CachedTimeFormatter(
         fmt='[%(asctime)s.%(msecs)03d] [%(levelname)s] [%(name)s] {%(module)s} - %(funcName)s(): %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
 
-    # common handler
-    _common_handler: logging.FileHandler | None = None
+    # common handler (opt-in: All.log doubles the file writes per record)
+    _attach_common: bool = False
+    _common_handler: logging.Handler | None = None
 
     # LoggerInfo by logger name
     _loggers: dict[str, LoggerInfo] = {}
@@ -53,6 +148,20 @@ class Logging:
         """
         return cls._construct_logger(name).logger
 
+    @classmethod
+    def is_debug_enabled(cls, name: str) -> bool:
+        """
+        Whether any sink of the logger accepts DEBUG records
+        (the logger object itself is always pinned at DEBUG, so
+        logger.isEnabledFor cannot answer this)
+        """
+        if cls._common_handler is not None:
+            return True
+        logger_info = cls._loggers.get(name)
+        if logger_info is None:
+            return True
+        return (logger_info.stdout_log_level or cls.DEBUG) <= cls.DEBUG or (logger_info.file_log_level or cls.DEBUG) <= cls.DEBUG
+
     @classmethod
     def set_file_log_level(cls, name: str, level: int):
         """
@@ -71,6 +180,38 @@ class Logging:
     def set_log_directory(cls, log_directory: str):
         cls._log_directory = Path(log_directory)
 
+    @classmethod
+    def set_common_log(cls, enabled: bool):
+        """
+        Enable or disable the shared All.log file
+        """
+        assert cls._common_handler is None, 'set_common_log must be called before the first get_logger'
+        cls._attach_common = enabled
+
+    @classmethod
+    def flush_all(cls):
+        """
+        Flush the buffered file handlers so nothing is lost on abnormal exit
+        """
+        for logger_info in cls._loggers.values():
+            if logger_info.file_handler is not None:
+                logger_info.file_handler.flush()
+        if cls._common_handler is not None:
+            cls._common_handler.flush()
+            if isinstance(cls._common_handler, logging.handlers.MemoryHandler) and cls._common_handler.target is not None:
+                cls._common_handler.target.flush()
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Stop the queue listeners, flushing the records still in flight
+        """
+        for logger_info in cls._loggers.values():
+            if logger_info.queue_listener is not None:
+                logger_info.queue_listener.stop()
+                logger_info.queue_listener = None
+        cls.flush_all()
+
     @classmethod
     def _construct_logger(cls, name: str) -> LoggerInfo:
         """
@@ -86,14 +227,15 @@ class Logging:
         log_directory.mkdir(exist_ok=True)
 
         # create common handler
-        if cls._common_handler is None:
-            cls._common_handler = logging.FileHandler(
-                filename=log_directory / f'All.log',
-                mode='w',
-                encoding='utf-8'
+        if cls._attach_common and cls._common_handler is None:
+            common_file_handler = JsonFileHandler(filename=log_directory / f'All.log')
+            common_file_handler.setLevel(cls.DEBUG)
+            # batch records in memory; only ERROR and above flush immediately
+            cls._common_handler = logging.handlers.MemoryHandler(
+                capacity=1024,
+                flushLevel=cls.ERROR,
+                target=common_file_handler
             )
-            cls._common_handler.setLevel(cls.DEBUG)
-            cls._common_handler.setFormatter(cls._common_formatter)
 
         # create LoggerInfo
         cls._loggers[name] = LoggerInfo(name=name)
@@ -106,13 +248,8 @@ class Logging:
         logger_info.stdout_log_level = stdout_handler.level
         logger_info.stdout_handler = stdout_handler
 
-        # file handler
-        file_handler = logging.FileHandler(
-            filename=log_directory / f'{name}.log',
-            mode='w',
-            encoding='utf-8'
-        )
-        file_handler.setFormatter(cls._common_formatter)
+        # file handler (JSON lines; the human-readable formatter stays on stdout)
+        file_handler = JsonFileHandler(filename=log_directory / f'{name}.log')
         file_handler.setLevel(logger_info.file_log_level or cls.DEBUG)
         logger_info.file_log_level = file_handler.level
         logger_info.file_handler = file_handler
@@ -122,11 +259,23 @@ class Logging:
             name=name,
             level=logging.DEBUG  # do not change logger level, change handlers' levels
         )
-        logger.addHandler(stdout_handler)
-        logger.addHandler(file_handler)
-        logger.addHandler(cls._common_handler)
+        # records go through a queue so the event loop never blocks on write();
+        # the real handlers run on the listener's background thread
+        log_queue = queue.Queue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        handlers = [stdout_handler, file_handler]
+        if cls._common_handler is not None:
+            handlers.append(cls._common_handler)
+        queue_listener = logging.handlers.QueueListener(
+            log_queue,
+            *handlers,
+            respect_handler_level=True
+        )
+        queue_listener.start()
+        logger_info.queue_listener = queue_listener
         logger_info.logger = logger
-        logger_info.check_correctness()  # Sanity check
+        if __debug__:
+            logger_info.check_correctness()  # Sanity check
         return logger_info
 
     @classmethod
@@ -139,10 +288,14 @@ class Logging:
             cls._loggers[name] = LoggerInfo(name=name)
         logger_info = cls._loggers[name]
         if is_file:
+            if logger_info.file_log_level == level:
+                return
             logger_info.file_log_level = level
             if logger_info.file_handler is not None:
                 logger_info.file_handler.setLevel(level)
         else:
+            if logger_info.stdout_log_level == level:
+                return
             logger_info.stdout_log_level = level
             if logger_info.stdout_handler is not None:
                 logger_info.stdout_handler.setLevel(level)
@@ -8,6 +8,8 @@ from order_manager import OrderManager
 from strategy import Strategy
 from log import Logging
 
+_ID_TYPE_TICKER = inv.InstrumentIdType.INSTRUMENT_ID_TYPE_TICKER
+
 
 async def main():
     with open('keys.yaml') as f:
@@ -22,7 +24,7 @@ async def main():
     async with inv.AsyncClient(token=token) as client:
         client: AsyncServices
         logger.info('Get instrument')
-        instrument = (await client.instruments.share_by(id_type=inv.InstrumentIdType.INSTRUMENT_ID_TYPE_TICKER, class_code='TQBR', id=ticker)).instrument
+        instrument = (await client.instruments.share_by(id_type=_ID_TYPE_TICKER, class_code='TQBR', id=ticker)).instrument
         logger.info('Construct MarketManager')
         mm = MarketManager(client, instrument)
         logger.info('Construct OrderManager')
@@ -39,11 +41,15 @@ async def main():
             logger.info('KeyboardInterrupt in main.py')
             logger.exception(ex)
             logger.info('Normal exit via KeyboardInterrupt')
+            Logging.flush_all()
         except Exception as ex:
             logger.error('Exception in main.py')
             logger.exception(ex)
             logger.error('Error exit')
-        logger.info('Final Exit')
+            Logging.flush_all()
+        finally:
+            logger.info('Final Exit')
+            Logging.shutdown()
 
 if __name__ == '__main__':
     asyncio.run(main())
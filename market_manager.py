@@ -2,32 +2,26 @@ import tinkoff.invest as inv
 from tinkoff.invest.async_services import AsyncServices
 from tinkoff.invest.async_services import AsyncMarketDataStreamManager
 from dataclasses import dataclass
-from decimal import Decimal
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from strategy import Strategy
 
-from utils import quotation_to_decimal
+from utils import PX_SCALE
 
 
-@dataclass
-class Quote:
-    px: Decimal
-    qty: int
-
-    def __init__(self, order: inv.Order):
-        self.px = quotation_to_decimal(order.price)
-        self.qty = order.quantity
-
-
-@dataclass
+@dataclass(slots=True)
 class OrderBook:
-    bids: list[Quote]
-    asks: list[Quote]
+    # parallel arrays ordered from best to worst price, px in nano ticks
+    bid_px: list[int]
+    bid_qty: list[int]
+    ask_px: list[int]
+    ask_qty: list[int]
 
     def __init__(self, orderbook: inv.OrderBook):
-        self.bids = [Quote(bid) for bid in orderbook.bids]
-        self.asks = [Quote(ask) for ask in orderbook.asks]
+        self.bid_px = [bid.price.units * PX_SCALE + bid.price.nano for bid in orderbook.bids]
+        self.bid_qty = [bid.quantity for bid in orderbook.bids]
+        self.ask_px = [ask.price.units * PX_SCALE + ask.price.nano for ask in orderbook.asks]
+        self.ask_qty = [ask.quantity for ask in orderbook.asks]
 
 
 class MarketManager:
@@ -1,14 +1,16 @@
 import tinkoff.invest as inv
 import asyncio
+import bisect
+import itertools
+import operator
 from tinkoff.invest.async_services import AsyncServices
-from decimal import Decimal
 from enum import IntEnum, Enum, auto
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 if TYPE_CHECKING:
     from strategy import Strategy
 
-from utils import decimal_to_quotation, quotation_to_decimal
+from utils import px_to_quotation, quotation_to_px
 from log import Logging
 
 
@@ -17,25 +19,27 @@ class Side(IntEnum):
     SELL = -1
 
     @classmethod
-    def from_direction(cls, direction: inv.OrderDirection):
-        match direction:
-            case inv.OrderDirection.ORDER_DIRECTION_BUY:
-                return cls.BUY
-            case inv.OrderDirection.ORDER_DIRECTION_SELL:
-                return cls.SELL
-            case _:
-                assert False, 'Unreachable'
+    def from_direction(cls, direction: inv.OrderDirection) -> 'Side':
+        return _DIR_TO_SIDE[direction]
 
 
-@dataclass
+_DIR_TO_SIDE = {
+    inv.OrderDirection.ORDER_DIRECTION_BUY: Side.BUY,
+    inv.OrderDirection.ORDER_DIRECTION_SELL: Side.SELL,
+}
+_SIDE_TO_DIR = {side: direction for direction, side in _DIR_TO_SIDE.items()}
+_ORDER_TYPE_LIMIT = inv.OrderType.ORDER_TYPE_LIMIT
+
+
+@dataclass(slots=True)
 class NewOrder:
     # only limit orders are supported
     qty: int
-    px: Decimal
+    px: int
     side: Side
 
 
-@dataclass
+@dataclass(slots=True)
 class CancelOrder:
     order: 'Order'
 
@@ -51,10 +55,10 @@ class OrderStatus(Enum):
         return self not in [self.FILLED, self.CANCELLED]
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     qty: int
-    px: Decimal
+    px: int
     side: Side
     status: OrderStatus
     id: str | None = None
@@ -67,28 +71,53 @@ class OrderEventType(Enum):
     CANCELLED = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderEvent:
     event_type: OrderEventType
     order: Order
 
 
-@dataclass
+# best-first insertion keys: buys descend by price, sells ascend
+def _buy_px_key(order: Order) -> int:
+    return -order.px
+
+
+_sell_px_key = operator.attrgetter('px')
+
+
+@dataclass(slots=True)
 class Orders:
-    by_side: dict[Side, list[Order]] = field(default_factory=lambda: {Side.BUY: [], Side.SELL: []})
+    buys: list[Order] = field(default_factory=list)
+    sells: list[Order] = field(default_factory=list)
+    # O(1) lookup indexes over the same orders
+    _by_id: dict[str, Order] = field(default_factory=dict)
+    _by_side_px_qty: dict[tuple[Side, int, int], Order] = field(default_factory=dict)
+    # number of orders in PENDING status, maintained on state transitions
+    _pending_count: int = 0
+
+    def __iter__(self) -> Iterator[Order]:
+        return self.get_all_orders()
 
-    def __iter__(self) -> list['Orders']:
-        return iter(self.get_all_orders())
+    def get_all_orders(self) -> Iterator[Order]:
+        return itertools.chain(self.buys, self.sells)
 
-    def get_all_orders(self) -> list[Order]:
-        return self.by_side[Side.BUY] + self.by_side[Side.SELL]
+    def get_all_orders_list(self) -> list[Order]:
+        return self.buys + self.sells
 
     def is_any_pending(self) -> bool:
-        return any([order.status == OrderStatus.PENDING for order in self.get_all_orders()])
+        return self._pending_count > 0
 
-    def clear_inactive_orders(self):
-        for side in [Side.BUY, Side.SELL]:
-            self.by_side[side] = [order for order in self.by_side[side] if order.status.is_active()]
+    def remove_order(self, order: Order):
+        # a fill and a cancel can both go terminal for the same order,
+        # so the second removal must be a no-op
+        side = self.buys if order.side == Side.BUY else self.sells
+        try:
+            side.remove(order)
+        except ValueError:
+            pass
+        self._by_side_px_qty.pop((order.side, order.px, order.qty), None)
+        if order.id is not None:
+            self._by_id.pop(order.id, None)
 
     def create_pending_order(self, request: NewOrder) -> OrderEvent | None:
         # insert new order
@@ -99,6 +128,7 @@ class Orders:
             status=OrderStatus.PENDING
         )
         self._insert_order(new_order)
+        self._pending_count += 1
 
         # return pending order event
         return OrderEvent(
@@ -109,6 +139,7 @@ class Orders:
     def process_pending_cancel(self, request: CancelOrder) -> OrderEvent | None:
         # update status
         request.order.status = OrderStatus.PENDING
+        self._pending_count += 1
 
         # return pending order event
         return OrderEvent(
@@ -119,12 +150,15 @@ class Orders:
     def process_post_order_response(self, response: inv.PostOrderResponse) -> OrderEvent | None:
         # find order
         side = Side.from_direction(response.direction)
-        px = quotation_to_decimal(response.initial_security_price)
+        px = quotation_to_px(response.initial_security_price)
         qty = response.lots_requested
         order = self._find_order_by_side_px_qty(side, px, qty)
 
         # update status
         order.id = response.order_id
+        self._by_id[order.id] = order
+        if order.status == OrderStatus.PENDING:
+            self._pending_count -= 1
         if order.qty == response.lots_executed:
             order.status = OrderStatus.FILLED
         else:
@@ -138,6 +172,8 @@ class Orders:
 
     def process_cancel_order_response(self, request: CancelOrder, response: inv.CancelOrderResponse) -> OrderEvent | None:
         order = request.order
+        if order.status == OrderStatus.PENDING:
+            self._pending_count -= 1
         order.status = OrderStatus.CANCELLED
 
         # return cancelled order event
@@ -148,16 +184,18 @@ class Orders:
 
     def process_get_order(self, logger, response: inv.OrderState) -> OrderEvent | None:
         # find order
-        side = Side.from_direction(response.direction)
         order_id = response.order_id
         try:
-            order = self._find_order_by_id(side, order_id)
-        except:
-            logger.error(f'{response} was not found in orders')
+            order = self._find_order_by_id(order_id)
+        except KeyError:
+            logger.error('%s was not found in orders', response)
             return None
 
         # update status
         if order.qty == response.lots_executed:
+            # the order may have been PENDING with a cancel in flight
+            if order.status == OrderStatus.PENDING:
+                self._pending_count -= 1
             order.status = OrderStatus.FILLED
             # return filled order event
             return OrderEvent(
@@ -169,19 +207,21 @@ class Orders:
         return None
 
     def _insert_order(self, order: Order):
-        side = self.by_side[order.side]
-        side.append(order)
-        # sort from best price to worst price
-        side.sort(key=lambda order: order.px * order.side, reverse=True)
+        if order.side == Side.BUY:
+            # binary insertion keeps the side sorted from best price to worst price
+            bisect.insort(self.buys, order, key=_buy_px_key)
+        else:
+            bisect.insort(self.sells, order, key=_sell_px_key)
+        self._by_side_px_qty[(order.side, order.px, order.qty)] = order
 
-    def _find_order_by_side_px_qty(self, side: Side, px: Decimal, qty: int) -> Order:
-        return next(filter(lambda order: order.px == px and order.qty == qty, self.by_side[side]))
+    def _find_order_by_side_px_qty(self, side: Side, px: int, qty: int) -> Order:
+        return self._by_side_px_qty[(side, px, qty)]
 
-    def _find_order_by_id(self, side: Side, order_id: int) -> Order:
-        return next(filter(lambda order: order.id == order_id, self.by_side[side]))
+    def _find_order_by_id(self, order_id: str) -> Order:
+        return self._by_id[order_id]
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     qty: int
 
@@ -215,17 +255,17 @@ class OrderManager:
         self._logger = Logging.get_logger('OrderManager')
         Logging.set_stdout_log_level('OrderManager', Logging.INFO)
 
-        self._logger.info(f'Initial position: {position}')
+        self._logger.info('Initial position: %s', position)
 
     def subscribe(self, strategy: 'Strategy'):
         self._strategy = strategy
 
     def post_order(self, order: NewOrder):
-        self._logger.info(f'Post order: {order=}')
+        self._logger.info('Post order: order=%s', order)
         self._order_queue.put_nowait(order)
 
     def cancel_order(self, order: CancelOrder):
-        self._logger.info(f'Cancel order: {order=}')
+        self._logger.info('Cancel order: order=%s', order)
         self._order_queue.put_nowait(order)
 
     async def run_loop(self):
@@ -234,27 +274,36 @@ class OrderManager:
 
     async def _order_consumer(self):
         while True:
-            order = await self._order_queue.get()
-            if isinstance(order, NewOrder):
-                await self._post_order_consumer(order)
-            elif isinstance(order, CancelOrder):
-                await self._cancel_order_consumer(order)
+            batch = [await self._order_queue.get()]
+            # drain the requests already queued and overlap their round trips
+            while True:
+                try:
+                    batch.append(self._order_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            await asyncio.gather(*[self._dispatch(order) for order in batch])
+
+    async def _dispatch(self, order: NewOrder | CancelOrder):
+        if isinstance(order, NewOrder):
+            await self._post_order_consumer(order)
+        elif isinstance(order, CancelOrder):
+            await self._cancel_order_consumer(order)
 
     async def _post_order_consumer(self, request: NewOrder):
-        self._logger.info(f'Post order: {request=}')
+        self._logger.info('Post order: request=%s', request)
         self._notify_strategy(self.orders.create_pending_order(request))
         response = await self._client.orders.post_order(
             figi=self._instrument.figi,
             quantity=request.qty,
-            price=decimal_to_quotation(request.px),
-            direction=inv.OrderDirection.ORDER_DIRECTION_BUY if request.side == Side.BUY else inv.OrderDirection.ORDER_DIRECTION_SELL,
-            order_type=inv.OrderType.ORDER_TYPE_LIMIT,
+            price=px_to_quotation(request.px),
+            direction=_SIDE_TO_DIR[request.side],
+            order_type=_ORDER_TYPE_LIMIT,
             account_id=self._account_id
         )
         self._notify_strategy(self.orders.process_post_order_response(response))
 
     async def _cancel_order_consumer(self, request: CancelOrder):
-        self._logger.info(f'Cancel order: {request=}')
+        self._logger.info('Cancel order: request=%s', request)
         self._notify_strategy(self.orders.process_pending_cancel(request))
         response = await self._client.orders.cancel_order(
             account_id=self._account_id,
@@ -264,12 +313,22 @@ class OrderManager:
 
     async def _monitor_orders(self):
         while True:
-            await asyncio.sleep(self.N_MS_BETWEEN_MONITOR_ORDERS / 100)
-            for order in self.orders:
-                if order.id is None or order.status == OrderStatus.FILLED:
-                    continue
-                order_state = await self._client.orders.get_order_state(account_id=self._account_id, order_id=order.id)
-                self._logger.debug(f'order_id={order.id}: {order_state}')
+            await asyncio.sleep(self.N_MS_BETWEEN_MONITOR_ORDERS / 1000)
+            monitored_orders = [order for order in self.orders if order.id is not None and order.status != OrderStatus.FILLED]
+            if not monitored_orders:
+                continue
+            # one bulk request instead of one get_order_state round trip per order
+            response = await self._client.orders.get_orders(account_id=self._account_id)
+            state_by_id = {state.order_id: state for state in response.orders}
+            debug_enabled = Logging.is_debug_enabled('OrderManager')
+            for order in monitored_orders:
+                order_state = state_by_id.get(order.id)
+                if order_state is None:
+                    # get_orders returns only active orders, so a missing id means
+                    # the order went terminal; fetch its final state individually
+                    order_state = await self._client.orders.get_order_state(account_id=self._account_id, order_id=order.id)
+                if debug_enabled:
+                    self._logger.debug('order_id=%s: %s', order.id, order_state)
                 self._notify_strategy(self.orders.process_get_order(self._logger, order_state))
 
     def _notify_strategy(self, order_event: OrderEvent | None):
@@ -278,5 +337,6 @@ class OrderManager:
             if order_event.event_type == OrderEventType.FILLED:
                 self.position.update_by_filled_order(order_event.order)
             self._strategy.on_order_event(order_event)
-            # remove filled order
-            self.orders.clear_inactive_orders()
+            # remove the order that became inactive; PENDING/OPEN events change nothing
+            if order_event.event_type in (OrderEventType.FILLED, OrderEventType.CANCELLED):
+                self.orders.remove_order(order_event.order)
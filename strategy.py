@@ -3,7 +3,6 @@ from enum import Enum, auto
 
 from order_manager import OrderManager, NewOrder, CancelOrder, Side, OrderEvent, OrderEventType, OrderStatus
 from market_manager import MarketManager, OrderBook
-from utils import quotation_to_decimal
 from log import Logging
 
 
@@ -31,7 +30,6 @@ class Strategy:
         self.mm = mm
         self.mm.subscribe(self, orderbook_depth=10)
         self.om.subscribe(self)
-        self.px_step = quotation_to_decimal(instrument.min_price_increment)
         self._logger = Logging.get_logger('Strategy')
         Logging.set_stdout_log_level('Strategy', Logging.INFO)
 
@@ -39,7 +37,8 @@ class Strategy:
         self.action = Action.BUY if om.position.qty == 0 else Action.SELL
 
     def on_orderbook_update(self):
-        self._logger.debug('OrderBook Update')
+        if Logging.is_debug_enabled('Strategy'):
+            self._logger.debug('OrderBook Update')
         if self.om.orders.is_any_pending():
             return
         if self.action == Action.WAIT:
@@ -50,7 +49,7 @@ class Strategy:
             self.buy_or_sell_action()
 
     def on_order_event(self, order_event: OrderEvent):
-        self._logger.info(f'Order event: {order_event}. Position: {self.om.position}. Orders: {self.om.orders}')
+        self._logger.info('Order event: %s. Position: %s. Orders: %s', order_event, self.om.position, self.om.orders)
         if order_event.event_type in [OrderEventType.FILLED, OrderEventType.CANCELLED]:
             self.buy_or_sell_action()
 
@@ -60,18 +59,21 @@ class Strategy:
         side = self.action.get_side()
         new_order = NewOrder(
             qty=1,
-            px=ob.bids[0].px if side == Side.BUY else ob.asks[0].px,
+            px=ob.bid_px[0] if side == Side.BUY else ob.ask_px[0],
             side=side
         )
-        self._logger.info(f'Create new order: {new_order}')
+        self._logger.info('Create new order: %s', new_order)
         self.om.post_order(new_order)
         self.action = Action.WAIT
 
     def possible_cancel_action(self):
-        orders = self.om.orders.get_all_orders()
+        orders = self.om.orders.get_all_orders_list()
         assert len(orders) == 1, orders
         order = orders[0]
-        ob_px = self.mm.ob.bids[0].px if order.side == Side.BUY else self.mm.ob.asks[0].px
-        if order.side * order.px < order.side * ob_px:
-            self._logger.info(f'Cancel {order}: ob_px={ob_px}')
+        if order.side == Side.BUY:
+            sign, ob_px = 1, self.mm.ob.bid_px[0]
+        else:
+            sign, ob_px = -1, self.mm.ob.ask_px[0]
+        if sign * order.px < sign * ob_px:
+            self._logger.info('Cancel %s: ob_px=%s', order, ob_px)
             self.om.cancel_order(CancelOrder(orders[0]))